@@ -1,8 +1,11 @@
 import sys
 import pygame
 
-from scripts.utils import load_images
+from scripts.utils import load_images, with_alpha
 from scripts.tilemap import Tilemap
+from scripts.edits import EditJournal, rect_cells, flood_cells, FLOOD_LIMIT
+from scripts.culling import Culler
+from scripts.render_queue import RenderQueue
 
 # Fator de escala para renderização
 RENDER_SCALE = 2.0
@@ -15,6 +18,9 @@ class Editor:
         pygame.display.set_caption('editor')
         self.screen = pygame.display.set_mode((640, 480))
         self.display = pygame.Surface((320, 240))  
+        self.culler = Culler(self.display.get_size())  # Descarta o que está fora da câmera
+        self.queue = RenderQueue(self.display)  # Agrupa os blits do tilemap em uma chamada
+        self.show_culling = False  # Mostra os contadores de culling no título da janela
 
         self.clock = pygame.time.Clock()
         
@@ -39,6 +45,9 @@ class Editor:
         except FileNotFoundError:
             pass
         
+        # Histórico de edições (desfazer/refazer)
+        self.journal = EditJournal(self.tilemap)
+        
         # Posição da câmera
         self.scroll = [0, 0]
         
@@ -53,6 +62,20 @@ class Editor:
         self.shift = False
         self.ongrid = True  # Se True, coloca tiles na grid
         
+        # Ferramentas da grid: 'paint', 'rect' (retângulo), 'fill' (balde) ou 'copy' (pincel de cópia)
+        self.tool = 'paint'
+        self.drag_start = None  # Célula onde começou o arraste (rect/copy)
+        self.brush = None  # Tiles copiados: {(dx, dy): (tipo, variante)}
+        
+    def current_tile(self):
+        # (tipo, variante) selecionado
+        return (self.tile_list[self.tile_group], self.tile_variant)
+        
+    def set_tool(self, tool):
+        # Alterna a ferramenta (apertar a tecla de novo volta ao pincel normal)
+        self.tool = 'paint' if self.tool == tool else tool
+        self.drag_start = None
+        
     def run(self):
         while True:
             self.display.fill((0, 0, 0))  # Limpa a tela
@@ -63,11 +86,12 @@ class Editor:
             render_scroll = (int(self.scroll[0]), int(self.scroll[1]))
             
             # Renderiza o tilemap
-            self.tilemap.render(self.display, offset=render_scroll)
+            self.culler.begin(render_scroll)
+            self.tilemap.render(self.queue, offset=render_scroll, culler=self.culler)
+            self.queue.flush()
             
             # Prepara a imagem do tile atual para visualização
-            current_tile_img = self.assets[self.tile_list[self.tile_group]][self.tile_variant].copy()
-            current_tile_img.set_alpha(100)  # Define transparência
+            current_tile_img = with_alpha(self.assets[self.tile_list[self.tile_group]][self.tile_variant], 100)  # Versão transparente (em cache)
             
             # Obtém a posição do mouse e calcula a posição do tile
             mpos = pygame.mouse.get_pos()
@@ -80,18 +104,27 @@ class Editor:
             else:
                 self.display.blit(current_tile_img, mpos)
             
-            # Adiciona ou remove tiles
-            if self.clicking and self.ongrid:
-                self.tilemap.tilemap[str(tile_pos[0]) + ';' + str(tile_pos[1])] = {'type': self.tile_list[self.tile_group], 'variant': self.tile_variant, 'pos': tile_pos}
-            if self.right_clicking:
-                tile_loc = str(tile_pos[0]) + ';' + str(tile_pos[1])
-                if tile_loc in self.tilemap.tilemap:
-                    del self.tilemap.tilemap[tile_loc]
+            # Mostra o retângulo sendo arrastado e o pincel de cópia
+            if self.drag_start:
+                x0, y0 = min(self.drag_start[0], tile_pos[0]), min(self.drag_start[1], tile_pos[1])
+                x1, y1 = max(self.drag_start[0], tile_pos[0]) + 1, max(self.drag_start[1], tile_pos[1]) + 1
+                pygame.draw.rect(self.display, (255, 255, 255), (x0 * self.tilemap.tile_size - render_scroll[0], y0 * self.tilemap.tile_size - render_scroll[1], (x1 - x0) * self.tilemap.tile_size, (y1 - y0) * self.tilemap.tile_size), 1)
+            elif self.tool == 'copy' and self.brush:
+                brush_cell = lambda item: ((tile_pos[0] + item[0][0]) * self.tilemap.tile_size, (tile_pos[1] + item[0][1]) * self.tilemap.tile_size)
+                for offset, tile in self.culler.cull('brush', list(self.brush.items()), self.tilemap.tile_size, pos=brush_cell):
+                    self.queue.blit(self.assets[tile[0]][tile[1]], ((tile_pos[0] + offset[0]) * self.tilemap.tile_size - render_scroll[0], (tile_pos[1] + offset[1]) * self.tilemap.tile_size - render_scroll[1]))
+                self.queue.flush()
+            
+            # Adiciona ou remove tiles (só escreve nas células que mudam)
+            if self.clicking and self.ongrid and self.tool == 'paint':
+                self.journal.edit({tile_pos: self.current_tile()})
+            if self.right_clicking and self.tool == 'paint':
+                self.journal.edit({tile_pos: None})
                 for tile in self.tilemap.offgrid_tiles.copy():
                     tile_img = self.assets[tile['type']][tile['variant']]
                     tile_r = pygame.Rect(tile['pos'][0] - self.scroll[0], tile['pos'][1] - self.scroll[1], tile_img.get_width(), tile_img.get_height())
                     if tile_r.collidepoint(mpos):
-                        self.tilemap.offgrid_tiles.remove(tile)
+                        self.journal.edit_offgrid(tile, False)
             
             # Mostra o tile atual no canto
             self.display.blit(current_tile_img, (5, 5))
@@ -103,10 +136,24 @@ class Editor:
                     sys.exit()
                     
                 if event.type == pygame.MOUSEBUTTONDOWN:
+                    if event.button in {1, 3} and self.tool == 'paint':
+                        self.journal.begin()  # O traço inteiro vira uma operação (na grid ou offgrid)
+                    elif event.button in {1, 3} and self.ongrid:
+                        if self.tool == 'rect' or (self.tool == 'copy' and not self.brush):
+                            self.drag_start = tile_pos
+                        elif self.tool == 'fill':
+                            fill = self.current_tile() if event.button == 1 else None
+                            cells = flood_cells(self.tilemap, tile_pos)
+                            if cells:
+                                self.journal.edit(dict.fromkeys(cells, fill))
+                            else:  # Região grande demais: não aplica um preenchimento pela metade
+                                pygame.display.set_caption('editor - preenchimento recusado: mais de ' + str(FLOOD_LIMIT) + ' células')
+                        elif self.tool == 'copy' and event.button == 1:  # Cola o pincel
+                            self.journal.edit({(tile_pos[0] + offset[0], tile_pos[1] + offset[1]): tile for offset, tile in self.brush.items()})
                     if event.button == 1:  # Botão esquerdo
                         self.clicking = True
                         if not self.ongrid:
-                            self.tilemap.offgrid_tiles.append({'type': self.tile_list[self.tile_group], 'variant': self.tile_variant, 'pos': (mpos[0] + self.scroll[0], mpos[1] + self.scroll[1])})
+                            self.journal.edit_offgrid({'type': self.tile_list[self.tile_group], 'variant': self.tile_variant, 'pos': (mpos[0] + self.scroll[0], mpos[1] + self.scroll[1])}, True)
                     if event.button == 3:  # Botão direito
                         self.right_clicking = True
                     if self.shift:  # Roda variantes com shift
@@ -122,10 +169,24 @@ class Editor:
                             self.tile_group = (self.tile_group + 1) % len(self.tile_list)
                             self.tile_variant = 0
                 if event.type == pygame.MOUSEBUTTONUP:
+                    if event.button in {1, 3} and self.drag_start:
+                        cells = rect_cells(self.drag_start, tile_pos)
+                        if self.tool == 'rect':  # Preenche (esquerdo) ou apaga (direito) o retângulo
+                            self.journal.edit(dict.fromkeys(cells, self.current_tile() if event.button == 1 else None))
+                        else:  # Copia o retângulo para o pincel
+                            origin = (min(self.drag_start[0], tile_pos[0]), min(self.drag_start[1], tile_pos[1]))
+                            self.brush = {}
+                            for cell in cells:
+                                tile = self.tilemap.tile_id(cell)
+                                if tile:
+                                    self.brush[(cell[0] - origin[0], cell[1] - origin[1])] = tile
+                        self.drag_start = None
                     if event.button == 1:
                         self.clicking = False
+                        self.journal.end()
                     if event.button == 3:
                         self.right_clicking = False
+                        self.journal.end()
                         
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_a:
@@ -139,11 +200,28 @@ class Editor:
                     if event.key == pygame.K_g:
                         self.ongrid = not self.ongrid  # Alterna entre ongrid/offgrid
                     if event.key == pygame.K_t:
-                        self.tilemap.autotile()  # Aplica autotile
+                        self.journal.edit(self.tilemap.autotile_changes())  # Aplica autotile
+                    if event.key == pygame.K_r:
+                        self.set_tool('rect')
+                    if event.key == pygame.K_f:
+                        self.set_tool('fill')
+                    if event.key == pygame.K_b:
+                        self.set_tool('copy')
+                    if event.key == pygame.K_ESCAPE:
+                        self.brush = None  # Limpa o pincel de cópia
+                    if event.key == pygame.K_z and pygame.key.get_mods() & pygame.KMOD_CTRL:
+                        self.journal.undo()
+                    if event.key == pygame.K_y and pygame.key.get_mods() & pygame.KMOD_CTRL:
+                        self.journal.redo()
                     if event.key == pygame.K_o:
                         self.tilemap.save('map.json')  # Salva o mapa
+                    if event.key == pygame.K_c:
+                        self.tilemap.save_chunks('map')  # Exporta o mapa em chunks (modo streaming)
                     if event.key == pygame.K_LSHIFT:
                         self.shift = True
+                    if event.key == pygame.K_F3:
+                        self.show_culling = not self.show_culling
+                        pygame.display.set_caption('editor')
                 if event.type == pygame.KEYUP:
                     if event.key == pygame.K_a:
                         self.movement[0] = False
@@ -156,6 +234,9 @@ class Editor:
                     if event.key == pygame.K_LSHIFT:
                         self.shift = False
             
+            if self.show_culling:
+                pygame.display.set_caption('editor - ' + self.culler.report())
+            
             # Renderiza a tela
             self.screen.blit(pygame.transform.scale(self.display, self.screen.get_size()), (0, 0))
             pygame.display.update()
@@ -2,6 +2,7 @@ import os
 import sys
 import math
 import random
+import time
 
 import pygame
 
@@ -11,6 +12,23 @@ from scripts.tilemap import Tilemap
 from scripts.clouds import Clouds
 from scripts.particle import Particle
 from scripts.spark import Spark
+from scripts.scheduler import Scheduler, geometric
+from scripts.input import Input
+from scripts.crowd import Crowd, use_crowd
+from scripts.render_queue import RenderQueue
+from scripts.capture import FrameRecorder
+from scripts.culling import Culler, ENTITY_EXTENT, PROJECTILE_EXTENT, PARTICLE_EXTENT, SPARK_EXTENT
+
+# Passos da simulação por segundo (independente da taxa de quadros)
+TICK_RATE = 60
+# Limite de quadros por segundo na tela (0 = sem limite)
+MAX_FPS = 240
+# Máximo de passos da simulação por quadro
+MAX_STEPS = 5
+# Gravação de frames (F9): formato ('png' ou 'raw'), buffers no anel e política com a fila cheia ('drop' ou 'block')
+CAPTURE_FORMAT = 'png'
+CAPTURE_BUFFERS = 16
+CAPTURE_POLICY = 'drop'
 
 class Game:
     def __init__(self):
@@ -20,9 +38,18 @@ class Game:
         pygame.display.set_caption("Arthur's Escape")
         self.screen = pygame.display.set_mode((640, 480))
         self.display = pygame.Surface((320, 240))  # Superfície menor para renderização escalada
+        self.culler = Culler(self.display.get_size())  # Descarta o que está fora da câmera
+        self.queue = RenderQueue(self.display)  # Agrupa os blits de cada camada em uma chamada
 
         self.clock = pygame.time.Clock()
         
+        # Input coletado no início de cada frame, com medição de latência
+        self.input = Input()
+        self.show_latency = False
+        
+        # Gravação de frames para QA (F9 liga/desliga)
+        self.recorder = None
+        
         # Controles de movimento [esquerda, direita]
         self.movement = [False, False]
         
@@ -65,22 +92,59 @@ class Game:
         self.screenshake = 0
         
     def load_level(self, map_id):
-        # Carrega o mapa do nível especificado
-        self.tilemap.load('data/maps/' + str(map_id) + '.json')
+        # Carrega o mapa do nível especificado (diretório de chunks ou JSON único)
+        if os.path.isdir('data/maps/' + str(map_id)):
+            self.tilemap.load_chunks('data/maps/' + str(map_id))
+        else:
+            self.tilemap.load('data/maps/' + str(map_id) + '.json')
         
         # Configura spawners de folhas (para efeitos visuais)
-        self.leaf_spawners = []
+        leaf_spawners = []
         for tree in self.tilemap.extract([('large_decor', 2)], keep=True):
-            self.leaf_spawners.append(pygame.Rect(4 + tree['pos'][0], 4 + tree['pos'][1], 23, 13))
+            leaf_spawners.append(pygame.Rect(4 + tree['pos'][0], 4 + tree['pos'][1], 23, 13))
             
-        # Configura inimigos e spawn points
-        self.enemies = []
+        # Configura spawn points do jogador e dos inimigos
+        player_spawn = None
+        enemy_spawns = []
         for spawner in self.tilemap.extract([('spawners', 0), ('spawners', 1)]):
             if spawner['variant'] == 0:  # Spawn do jogador
-                self.player.pos = spawner['pos']
-                self.player.air_time = 0
+                player_spawn = spawner['pos']
             else:  # Spawn de inimigos
-                self.enemies.append(Enemy(self, spawner['pos'], (8, 15)))
+                enemy_spawns.append(spawner['pos'])
+                
+        # Guarda o nível já preparado (com os chunks ao redor dos spawns) para reiniciar sem acessar o disco
+        self.snapshot = {
+            'tilemap': self.tilemap.snapshot(([player_spawn] if player_spawn else []) + enemy_spawns),
+            'leaf_spawners': leaf_spawners,
+            'player_spawn': player_spawn,
+            'enemy_spawns': enemy_spawns,
+        }
+        self.reset_level()
+        
+    def reset_level(self):
+        # Reinicia o nível a partir do snapshot em memória
+        self.tilemap.restore(self.snapshot['tilemap'])
+        
+        # Eventos agendados do nível (folhas, inimigos, projéteis)
+        self.scheduler = Scheduler()
+        
+        self.leaf_spawners = self.snapshot['leaf_spawners']
+        for rect in self.leaf_spawners:
+            self.schedule_leaf(rect)
+            
+        # Posiciona o jogador e cria os inimigos
+        if self.snapshot['player_spawn']:
+            self.player.pos = list(self.snapshot['player_spawn'])
+            self.player.air_time = 0
+        self.enemies = []
+        for pos in self.snapshot['enemy_spawns']:
+            self.enemies.append(Enemy(self, pos, (8, 15)))
+            
+        # Níveis com muitos inimigos usam a simulação em lote (NumPy)
+        self.crowd = Crowd(self, self.enemies) if use_crowd(self.enemies) else None
+            
+        # Garante os chunks ao redor do jogador e dos inimigos (já restaurados do snapshot)
+        self.tilemap.stream(self.stream_points(), block=True)
             
         # Inicializa listas de objetos do jogo
         self.projectiles = []
@@ -89,137 +153,251 @@ class Game:
         
         # Configuração de câmera e estado do jogo
         self.scroll = [0, 0]
+        self.prev_scroll = [0, 0]  # Câmera no passo anterior (para interpolação)
+        self.player.prev_pos = list(self.player.pos)
         self.dead = 0  # Contador de morte
         self.transition = -30  # Transição entre níveis
         
-    def run(self):
-        while True:
-            # Renderiza o fundo
-            self.display.blit(self.assets['background'], (0, 0))
-            
-            # Atualiza o efeito de tremor de tela
-            self.screenshake = max(0, self.screenshake - 1)
-            
-            # Lógica de transição entre níveis
-            if not len(self.enemies):  # Se não há inimigos
-                self.transition += 1
-                if self.transition > 30:  # Espera 30 frames
-                    self.level = min(self.level + 1, len(os.listdir('data/maps')) - 1)
-                    self.load_level(self.level)
-            if self.transition < 0:
-                self.transition += 1
-            
-            # Lógica de morte do jogador
-            if self.dead:
-                self.dead += 1
-                if self.dead >= 10:
-                    self.transition = min(30, self.transition + 1)
-                if self.dead > 40:
-                    self.load_level(self.level)  # Recarrega o nível
-            
-            # Movimento suave da câmera para seguir o jogador
-            self.scroll[0] += (self.player.rect().centerx - self.display.get_width() / 2 - self.scroll[0]) / 30
-            self.scroll[1] += (self.player.rect().centery - self.display.get_height() / 2 - self.scroll[1]) / 30
-            render_scroll = (int(self.scroll[0]), int(self.scroll[1]))
-            
-            # Spawn de folhas aleatórias
-            for rect in self.leaf_spawners:
-                if random.random() * 49999 < rect.width * rect.height:
-                    pos = (rect.x + random.random() * rect.width, rect.y + random.random() * rect.height)
-                    self.particles.append(Particle(self, 'leaf', pos, velocity=[-0.1, 0.3], frame=random.randint(0, 20)))
-            
-            # Atualiza e renderiza as nuvens
-            self.clouds.update()
-            self.clouds.render(self.display, offset=render_scroll)
-            
-            # Renderiza o tilemap
-            self.tilemap.render(self.display, offset=render_scroll)
-            
-            # Atualiza e renderiza inimigos
+    def schedule_leaf(self, rect):
+        # Agenda a próxima folha do spawner (mesma chance por frame de antes)
+        self.scheduler.schedule(geometric(rect.width * rect.height / 49999), self.spawn_leaf, rect)
+        
+    def spawn_leaf(self, rect):
+        pos = (rect.x + random.random() * rect.width, rect.y + random.random() * rect.height)
+        self.particles.append(Particle(self, 'leaf', pos, velocity=[-0.1, 0.3], frame=random.randint(0, 20)))
+        self.schedule_leaf(rect)
+        
+    def add_projectile(self, pos, direction):
+        # Cria um projétil [posição, direção] que expira após 360 frames
+        projectile = [pos, direction]
+        self.projectiles.append(projectile)
+        self.scheduler.schedule(361, self.expire_projectile, projectile)
+        
+    def expire_projectile(self, projectile):
+        for i, other in enumerate(self.projectiles):
+            if other is projectile:
+                del self.projectiles[i]
+                break
+        
+    def stream_points(self):
+        # Pontos ao redor dos quais o mapa precisa estar carregado
+        points = [self.player.pos]
+        if self.crowd:
+            return points + self.crowd.points()
+        for enemy in self.enemies:
+            points.append(enemy.pos)
+        return points
+        
+    def handle_event(self, event):
+        # Aplica um evento de input ao estado do jogo
+        if event.type == pygame.QUIT:
+            if self.recorder:
+                self.toggle_recording()
+            pygame.quit()
+            sys.exit()
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_LEFT:
+                self.movement[0] = True  
+            if event.key == pygame.K_RIGHT:
+                self.movement[1] = True  
+            if event.key == pygame.K_UP:
+                self.player.jump()  
+            if event.key == pygame.K_x:
+                self.player.dash()  
+            if event.key == pygame.K_F9:
+                self.toggle_recording()
+            if event.key == pygame.K_F3:
+                self.show_latency = not self.show_latency  # Mostra latência e culling no título da janela
+                pygame.display.set_caption("Arthur's Escape")
+        if event.type == pygame.KEYUP:
+            if event.key == pygame.K_LEFT:
+                self.movement[0] = False
+            if event.key == pygame.K_RIGHT:
+                self.movement[1] = False
+                
+    def toggle_recording(self):
+        # Inicia ou encerra a gravação em captures/<data e hora>/
+        if self.recorder:
+            self.recorder.stop()
+            self.recorder = None
+        else:
+            self.recorder = FrameRecorder(self.display.get_size(), 'captures/' + time.strftime('%Y%m%d-%H%M%S'), fmt=CAPTURE_FORMAT, buffers=CAPTURE_BUFFERS, policy=CAPTURE_POLICY)
+                
+    def update(self):
+        # Um passo fixo da simulação (1 / TICK_RATE segundos)
+        self.prev_scroll = list(self.scroll)
+        
+        # Atualiza o efeito de tremor de tela
+        self.screenshake = max(0, self.screenshake - 1)
+        
+        # Lógica de transição entre níveis
+        if not len(self.enemies):  # Se não há inimigos
+            self.transition += 1
+            if self.transition > 30:  # Espera 30 frames
+                self.level = min(self.level + 1, len({os.path.splitext(name)[0] for name in os.listdir('data/maps')}) - 1)
+                self.load_level(self.level)
+        if self.transition < 0:
+            self.transition += 1
+        
+        # Lógica de morte do jogador
+        if self.dead:
+            self.dead += 1
+            if self.dead >= 10:
+                self.transition = min(30, self.transition + 1)
+            if self.dead > 40:
+                self.reset_level()  # Reinicia o nível a partir do snapshot
+        
+        # Movimento suave da câmera para seguir o jogador
+        self.scroll[0] += (self.player.rect().centerx - self.display.get_width() / 2 - self.scroll[0]) / 30
+        self.scroll[1] += (self.player.rect().centery - self.display.get_height() / 2 - self.scroll[1]) / 30
+        
+        # Streaming de chunks ao redor da câmera e das entidades
+        self.tilemap.stream(self.stream_points() + [(self.scroll[0] + self.display.get_width() / 2, self.scroll[1] + self.display.get_height() / 2)])
+        
+        # Atualiza as nuvens
+        self.clouds.update()
+        
+        # Atualiza inimigos
+        if self.crowd:
+            for enemy in self.crowd.update(self.tilemap):
+                self.enemies.remove(enemy)
+        else:
             for enemy in self.enemies.copy():
                 kill = enemy.update(self.tilemap, (0, 0))
-                enemy.render(self.display, offset=render_scroll)
                 if kill:  
                     self.enemies.remove(enemy)
-            
-            # Atualiza e renderiza o jogador (se não estiver morto)
-            if not self.dead:
-                self.player.update(self.tilemap, (self.movement[1] - self.movement[0], 0))
-                self.player.render(self.display, offset=render_scroll)
-            
-            # Atualiza e renderiza projéteis
-            for projectile in self.projectiles.copy():
-                projectile[0][0] += projectile[1]  # Move o projétil
-                projectile[2] += 1  # Incrementa o timer
-                img = self.assets['projectile']
-                self.display.blit(img, (projectile[0][0] - img.get_width() / 2 - render_scroll[0], projectile[0][1] - img.get_height() / 2 - render_scroll[1]))
-                # Verifica colisão com o tilemap
-                if self.tilemap.solid_check(projectile[0]):
-                    self.projectiles.remove(projectile)
-                    # Cria efeitos de spark ao colidir
-                    for i in range(4):
-                        self.sparks.append(Spark(projectile[0], random.random() - 0.5 + (math.pi if projectile[1] > 0 else 0), 2 + random.random()))
-                elif projectile[2] > 360:  # Remove se existir por muito tempo
+        
+        # Atualiza o jogador (se não estiver morto)
+        if not self.dead:
+            self.player.update(self.tilemap, (self.movement[1] - self.movement[0], 0))
+        
+        # Atualiza projéteis
+        for projectile in self.projectiles.copy():
+            projectile[0][0] += projectile[1]  # Move o projétil
+            # Verifica colisão com o tilemap
+            if self.tilemap.solid_check(projectile[0]):
+                self.projectiles.remove(projectile)
+                # Cria efeitos de spark ao colidir
+                for i in range(4):
+                    self.sparks.append(Spark(projectile[0], random.random() - 0.5 + (math.pi if projectile[1] > 0 else 0), 2 + random.random()))
+            elif abs(self.player.dashing) < 50:  # Verifica colisão com o jogador
+                if self.player.rect().collidepoint(projectile[0]):
                     self.projectiles.remove(projectile)
-                elif abs(self.player.dashing) < 50:  # Verifica colisão com o jogador
-                    if self.player.rect().collidepoint(projectile[0]):
-                        self.projectiles.remove(projectile)
-                        self.dead += 1
-                        self.screenshake = max(16, self.screenshake)
-                        # Cria efeitos de morte
-                        for i in range(30):
-                            angle = random.random() * math.pi * 2
-                            speed = random.random() * 5
-                            self.sparks.append(Spark(self.player.rect().center, angle, 2 + random.random()))
-                            self.particles.append(Particle(self, 'particle', self.player.rect().center, velocity=[math.cos(angle + math.pi) * speed * 0.5, math.sin(angle + math.pi) * speed * 0.5], frame=random.randint(0, 7)))
-                        
-            # Atualiza e renderiza sparks
-            for spark in self.sparks.copy():
-                kill = spark.update()
-                spark.render(self.display, offset=render_scroll)
-                if kill:
-                    self.sparks.remove(spark)
+                    self.dead += 1
+                    self.screenshake = max(16, self.screenshake)
+                    # Cria efeitos de morte
+                    for i in range(30):
+                        angle = random.random() * math.pi * 2
+                        speed = random.random() * 5
+                        self.sparks.append(Spark(self.player.rect().center, angle, 2 + random.random()))
+                        self.particles.append(Particle(self, 'particle', self.player.rect().center, velocity=[math.cos(angle + math.pi) * speed * 0.5, math.sin(angle + math.pi) * speed * 0.5], frame=random.randint(0, 7)))
+                    
+        # Atualiza sparks
+        for spark in self.sparks.copy():
+            kill = spark.update()
+            if kill:
+                self.sparks.remove(spark)
+        
+        # Atualiza partículas
+        for particle in self.particles.copy():
+            kill = particle.update()
+            if particle.type == 'leaf':  # Movimento especial para folhas
+                particle.pos[0] += math.sin(particle.animation.frame * 0.035) * 0.3
+            if kill:
+                self.particles.remove(particle)
+        
+        # Executa os eventos agendados que vencem neste frame
+        self.scheduler.update()
+        
+    def render(self, alpha):
+        # Desenha o estado interpolado entre os dois últimos passos da simulação
+        render_scroll = (int(self.prev_scroll[0] + (self.scroll[0] - self.prev_scroll[0]) * alpha), int(self.prev_scroll[1] + (self.scroll[1] - self.prev_scroll[1]) * alpha))
+        
+        # Camada de sprites: fundo, nuvens, tiles, entidades e projéteis vão para a fila
+        self.queue.begin()
+        self.queue.blit(self.assets['background'], (0, 0))
+        
+        # Renderiza as nuvens e o tilemap
+        self.culler.begin(render_scroll)
+        self.clouds.render(self.queue, offset=render_scroll)
+        self.tilemap.render(self.queue, offset=render_scroll, culler=self.culler)
+        
+        # Renderiza inimigos e o jogador (só os visíveis na câmera)
+        if self.crowd:
+            enemies = self.culler.record('enemies', self.crowd.visible(self.culler.bounds(ENTITY_EXTENT)), len(self.enemies))
+            for enemy in enemies:
+                self.crowd.sync(enemy)
+        else:
+            enemies = self.culler.cull('enemies', self.enemies, ENTITY_EXTENT)
+        for enemy in enemies:
+            enemy.render(self.queue, offset=enemy.interpolated_offset(render_scroll, alpha))
+        if not self.dead:
+            self.player.render(self.queue, offset=self.player.interpolated_offset(render_scroll, alpha))
+        
+        # Renderiza projéteis
+        img = self.assets['projectile']
+        for projectile in self.culler.cull('projectiles', self.projectiles, PROJECTILE_EXTENT, pos=lambda projectile: projectile[0]):
+            x = projectile[0][0] + projectile[1] * (alpha - 1)  # Interpola entre o passo anterior e o atual
+            self.queue.blit(img, (x - img.get_width() / 2 - render_scroll[0], projectile[0][1] - img.get_height() / 2 - render_scroll[1]))
+        self.queue.flush()
+        
+        # Sparks são polígonos, desenhados direto entre as duas camadas
+        for spark in self.culler.cull('sparks', self.sparks, SPARK_EXTENT):
+            spark.render(self.display, offset=spark.interpolated_offset(render_scroll, alpha))
             
-            # Atualiza e renderiza partículas
-            for particle in self.particles.copy():
-                kill = particle.update()
-                particle.render(self.display, offset=render_scroll)
-                if particle.type == 'leaf':  # Movimento especial para folhas
-                    particle.pos[0] += math.sin(particle.animation.frame * 0.035) * 0.3
-                if kill:
-                    self.particles.remove(particle)
+        # Camada de partículas
+        for particle in self.culler.cull('particles', self.particles, PARTICLE_EXTENT):
+            particle.render(self.queue, offset=particle.interpolated_offset(render_scroll, alpha))
+        self.queue.flush()
+                    
+        # Efeito de transição entre níveis
+        if self.transition:
+            transition_surf = pygame.Surface(self.display.get_size())
+            pygame.draw.circle(transition_surf, (255, 255, 255), (self.display.get_width() // 2, self.display.get_height() // 2), (30 - abs(self.transition)) * 8)
+            transition_surf.set_colorkey((255, 255, 255))
+            self.display.blit(transition_surf, (0, 0))
+        
+        # Aplica tremor de tela e renderiza na janela principal
+        screenshake_offset = (random.random() * self.screenshake - self.screenshake / 2, random.random() * self.screenshake - self.screenshake / 2)
+        self.screen.blit(pygame.transform.scale(self.display, self.screen.get_size()), screenshake_offset)
+        
+    def run(self):
+        step = 1 / TICK_RATE
+        accumulator = step  # Garante um passo da simulação no primeiro frame
+        while True:
+            frame_start = time.perf_counter()
+            
+            # Coleta o input no início do frame
+            self.input.poll()
             
-            # Trata eventos de input
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_LEFT:
-                        self.movement[0] = True  
-                    if event.key == pygame.K_RIGHT:
-                        self.movement[1] = True  
-                    if event.key == pygame.K_UP:
-                        self.player.jump()  
-                    if event.key == pygame.K_x:
-                        self.player.dash()  
-                if event.type == pygame.KEYUP:
-                    if event.key == pygame.K_LEFT:
-                        self.movement[0] = False
-                    if event.key == pygame.K_RIGHT:
-                        self.movement[1] = False
-                        
-            # Efeito de transição entre níveis
-            if self.transition:
-                transition_surf = pygame.Surface(self.display.get_size())
-                pygame.draw.circle(transition_surf, (255, 255, 255), (self.display.get_width() // 2, self.display.get_height() // 2), (30 - abs(self.transition)) * 8)
-                transition_surf.set_colorkey((255, 255, 255))
-                self.display.blit(transition_surf, (0, 0))
+            # Simulação em passo fixo, independente da taxa de atualização da tela
+            steps = 0
+            while accumulator >= step and steps < MAX_STEPS:
+                # Aplica o input antes de atualizar o jogador
+                for event in self.input.take():
+                    self.handle_event(event)
+                self.update()
+                accumulator -= step
+                steps += 1
+            if steps == MAX_STEPS:  # Descarta o atraso acumulado (ex.: janela arrastada)
+                accumulator %= step
             
-            # Aplica tremor de tela e renderiza na janela principal
-            screenshake_offset = (random.random() * self.screenshake - self.screenshake / 2, random.random() * self.screenshake - self.screenshake / 2)
-            self.screen.blit(pygame.transform.scale(self.display, self.screen.get_size()), screenshake_offset)
+            self.render(accumulator / step)
             pygame.display.update()
-            self.clock.tick(60)  
+            self.input.presented()
+            
+            # Copia o frame para a gravação (salvo em outra thread), só quando a simulação
+            # avançou: quadros extras entre passos só interpolam e não entram no vídeo
+            if self.recorder and steps:
+                self.recorder.capture(self.display)
+            
+            # Relatório de latência no título da janela
+            if self.show_latency and self.scheduler.frame % TICK_RATE == 0:
+                pygame.display.set_caption("Arthur's Escape - " + self.input.report() + ' | ' + self.culler.report() + ' | blits: ' + str(self.queue.blits) + ' em ' + str(self.queue.flushes) + ' lotes' + (' | ' + self.recorder.report() if self.recorder else ''))
+            
+            # Espera o fim do quadro coletando o input (em vez de dormir em clock.tick)
+            if MAX_FPS:
+                self.input.wait(frame_start + 1 / MAX_FPS)
+            accumulator += self.clock.tick() / 1000
 
 Game().run()
\ No newline at end of file
@@ -0,0 +1,112 @@
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+import pygame
+
+def png_chunk(tag, data):
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+def encode_png(surf):
+    # Codifica a Surface em PNG RGB. O zlib solta o GIL enquanto comprime,
+    # então a thread principal continua rodando durante a codificação.
+    width, height = surf.get_size()
+    pixels = pygame.image.tobytes(surf, 'RGB')
+    stride = width * 3
+    rows = b''.join(b'\x00' + pixels[y * stride:(y + 1) * stride] for y in range(height))  # Filtro 0 em cada linha
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    # Compressão nível 1: arquivo maior, mas acompanha o ritmo do jogo
+    return b'\x89PNG\r\n\x1a\n' + png_chunk(b'IHDR', header) + png_chunk(b'IDAT', zlib.compress(rows, 1)) + png_chunk(b'IEND', b'')
+
+class FrameRecorder:
+    # Grava os frames apresentados sem travar o jogo: o frame é copiado para um
+    # anel de Surfaces pré-alocadas e uma thread codifica e salva em disco.
+    def __init__(self, size, path, fmt='png', buffers=16, policy='drop'):
+        self.path = path  # Diretório da gravação
+        self.fmt = fmt  # 'png' (sequência de imagens) ou 'raw' (stream RGB + índice)
+        self.policy = policy  # Fila cheia: 'drop' descarta o frame, 'block' espera um buffer
+        self.start = time.perf_counter()
+
+        # Anel de buffers: os livres ficam em free, os ocupados na fila do worker
+        self.free = queue.Queue()
+        for i in range(buffers):
+            self.free.put(pygame.Surface(size).convert())
+        self.pending = queue.Queue(maxsize=buffers)
+
+        # Contadores
+        self.frame = 0  # Frames apresentados desde o início da gravação
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0  # Frames perdidos por erro de escrita
+        self.error = None  # Primeiro erro do worker; depois dele nenhum frame é aceito
+
+        os.makedirs(path, exist_ok=True)
+        if fmt == 'raw':
+            self.stream = open(os.path.join(path, 'frames.raw'), 'wb')
+            self.index = open(os.path.join(path, 'index.txt'), 'w')
+            self.index.write('size ' + str(size[0]) + ' ' + str(size[1]) + ' RGB\n')  # Cabeçalho: formato dos frames
+
+        self.thread = threading.Thread(target=self.work, daemon=True)
+        self.thread.start()
+
+    def capture(self, surf):
+        # Copia o frame para um buffer livre e o entrega ao worker
+        if self.error:
+            return
+        self.frame += 1
+        try:
+            buffer = self.free.get(block=self.policy == 'block')
+        except queue.Empty:  # Todos os buffers ocupados: descarta o frame
+            self.dropped += 1
+            return
+        buffer.blit(surf, (0, 0))
+        self.pending.put((self.frame, time.perf_counter() - self.start, buffer))
+        self.captured += 1
+
+    def work(self):
+        while True:
+            item = self.pending.get()
+            if item is None:  # Sinal de parada
+                break
+            frame, timestamp, buffer = item
+            if self.error:  # Depois de um erro, só devolve os buffers pendentes
+                self.failed += 1
+                self.free.put(buffer)
+                continue
+            try:
+                if self.fmt == 'raw':
+                    # Índice: número do frame, posição no stream e tempo (segundos)
+                    self.index.write(str(frame) + ' ' + str(self.stream.tell()) + ' ' + '%.4f' % timestamp + '\n')
+                    self.stream.write(pygame.image.tobytes(buffer, 'RGB'))
+                else:
+                    f = open(os.path.join(self.path, '%06d.png' % frame), 'wb')
+                    try:
+                        f.write(encode_png(buffer))
+                    finally:
+                        f.close()
+                self.written += 1
+            except (OSError, pygame.error) as e:  # Ex.: disco cheio ou sem permissão
+                self.failed += 1
+                self.error = str(e)
+            self.free.put(buffer)  # Devolve o buffer ao anel
+
+    def stop(self):
+        # Espera o worker salvar os frames pendentes e fecha os arquivos
+        self.pending.put(None)
+        self.thread.join()
+        if self.fmt == 'raw':
+            try:
+                self.stream.close()
+                self.index.close()
+            except OSError as e:
+                self.error = self.error or str(e)
+
+    def report(self):
+        report = 'rec: ' + str(self.written) + '/' + str(self.captured) + ' salvos, ' + str(self.dropped) + ' descartados'
+        if self.error:
+            report += ', ' + str(self.failed) + ' com erro (parada: ' + self.error + ')'
+        return report
@@ -0,0 +1,73 @@
+import json
+import os
+import queue
+import threading
+
+# Arquivo com os metadados de um mapa salvo em chunks
+META_FILE = 'meta.json'
+
+def chunk_path(path, chunk_loc):
+    # Caminho do arquivo de um chunk dentro do diretório do mapa
+    return os.path.join(path, chunk_loc + '.json')
+
+def read_chunk(path, chunk_loc):
+    # Lê os tiles de um chunk do disco (chunks vazios não têm arquivo)
+    try:
+        f = open(chunk_path(path, chunk_loc), 'r')
+    except FileNotFoundError:
+        return {}
+    chunk_data = json.load(f)
+    f.close()
+    return chunk_data
+
+def write_chunk(path, chunk_loc, tiles):
+    # Salva os tiles de um chunk em seu próprio arquivo
+    f = open(chunk_path(path, chunk_loc), 'w')
+    json.dump(tiles, f)
+    f.close()
+
+class ChunkLoader:
+    def __init__(self, path):
+        self.path = path  # Diretório do mapa
+        self.requests = queue.Queue()  # Chunks pedidos pela thread principal
+        self.results = queue.Queue()  # Chunks já lidos do disco
+        self.pending = set()  # Chunks pedidos que ainda não chegaram
+
+        # Thread de fundo que lê os chunks sem travar o frame
+        self.thread = threading.Thread(target=self.work, daemon=True)
+        self.thread.start()
+
+    def work(self):
+        while True:
+            chunk_loc = self.requests.get()
+            if chunk_loc is None:  # Sinal de parada
+                break
+            self.results.put((chunk_loc, read_chunk(self.path, chunk_loc)))
+
+    def request(self, chunk_loc):
+        # Pede um chunk para a thread de fundo (ignora pedidos repetidos)
+        if chunk_loc not in self.pending:
+            self.pending.add(chunk_loc)
+            self.requests.put(chunk_loc)
+
+    def load_now(self, chunk_loc):
+        # Lê um chunk imediatamente na thread principal
+        self.pending.discard(chunk_loc)
+        return read_chunk(self.path, chunk_loc)
+
+    def poll(self):
+        # Retorna os chunks que terminaram de carregar desde a última chamada
+        loaded = []
+        while True:
+            try:
+                chunk_loc, tiles = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if chunk_loc in self.pending:  # Chunks já lidos com load_now são descartados
+                self.pending.remove(chunk_loc)
+                loaded.append((chunk_loc, tiles))
+        return loaded
+
+    def stop(self):
+        # Encerra a thread de fundo
+        self.requests.put(None)
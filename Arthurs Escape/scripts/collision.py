@@ -0,0 +1,60 @@
+# Movimento com colisão contra o bitmap de tiles sólidos do Tilemap.
+# Cada eixo é varrido da posição antiga até a nova, então movimentos rápidos
+# (como o dash) não atravessam tiles. A posição é truncada como em pygame.Rect.
+
+def column_hit(solid_at, col, top, bottom):
+    # Verifica se há tile sólido na coluna col entre as linhas top e bottom
+    for row in range(top, bottom + 1):
+        if solid_at(col, row):
+            return True
+    return False
+
+def row_hit(solid_at, row, left, right):
+    # Verifica se há tile sólido na linha row entre as colunas left e right
+    for col in range(left, right + 1):
+        if solid_at(col, row):
+            return True
+    return False
+
+def move(tilemap, pos, size, movement, collisions):
+    # Move pos (lista [x, y]) resolvendo X e depois Y; preenche collisions
+    ts = tilemap.tile_size
+    solid_at = tilemap.solid_at
+
+    # Movimento em X
+    old_x = int(pos[0])
+    pos[0] += movement[0]
+    new_x = int(pos[0])
+    top = int(pos[1]) // ts
+    bottom = (int(pos[1]) + size[1] - 1) // ts
+    if movement[0] > 0:
+        for col in range((old_x + size[0] - 1) // ts, (new_x + size[0] - 1) // ts + 1):
+            if column_hit(solid_at, col, top, bottom):
+                pos[0] = col * ts - size[0]  # Colisão à direita
+                collisions['right'] = True
+                break
+    elif movement[0] < 0:
+        for col in range(old_x // ts, new_x // ts - 1, -1):
+            if column_hit(solid_at, col, top, bottom):
+                pos[0] = (col + 1) * ts  # Colisão à esquerda
+                collisions['left'] = True
+                break
+
+    # Movimento em Y
+    old_y = int(pos[1])
+    pos[1] += movement[1]
+    new_y = int(pos[1])
+    left = int(pos[0]) // ts
+    right = (int(pos[0]) + size[0] - 1) // ts
+    if movement[1] > 0:
+        for row in range((old_y + size[1] - 1) // ts, (new_y + size[1] - 1) // ts + 1):
+            if row_hit(solid_at, row, left, right):
+                pos[1] = row * ts - size[1]  # Colisão abaixo
+                collisions['down'] = True
+                break
+    elif movement[1] < 0:
+        for row in range(old_y // ts, new_y // ts - 1, -1):
+            if row_hit(solid_at, row, left, right):
+                pos[1] = (row + 1) * ts  # Colisão acima
+                collisions['up'] = True
+                break
@@ -0,0 +1,216 @@
+import math
+import random
+
+try:
+    import numpy as np
+except ImportError:  # O modo multidão é opcional
+    np = None
+
+from scripts.particle import Particle
+from scripts.scheduler import geometric
+from scripts.spark import Spark
+from scripts.tilemap import CHUNK_SIZE
+
+# Quantidade mínima de inimigos para ativar o modo multidão (se o NumPy estiver instalado)
+CROWD_MIN_ENEMIES = 64
+# Multiplicador que junta (chunk x, chunk y) em uma chave inteira
+CHUNK_KEY = 2 ** 32
+
+def use_crowd(enemies):
+    # Se o modo multidão deve simular essa lista de inimigos
+    return np is not None and len(enemies) >= CROWD_MIN_ENEMIES
+
+class Crowd:
+    # Estado de todos os inimigos em arrays do NumPy, atualizados em lote.
+    # Os objetos Enemy continuam existindo como "views" para renderizar.
+    def __init__(self, game, enemies):
+        self.game = game
+        self.enemies = list(enemies)  # Views, na mesma ordem dos arrays
+        self.size = enemies[0].size
+        count = len(self.enemies)
+
+        self.pos = np.array([enemy.pos for enemy in self.enemies], dtype=float)
+        self.prev_pos = self.pos.copy()
+        self.velocity_y = np.zeros(count)
+        self.flip = np.zeros(count, dtype=bool)
+        self.walking = np.zeros(count, dtype=int)  # Timer para andar
+        # Frame em que cada inimigo parado começa a andar (1% de chance por frame, como Enemy.idle)
+        frame = game.scheduler.frame
+        self.walk_at = np.array([frame + geometric(0.01) - 1 for i in range(count)], dtype=np.int64)
+        self.collisions = {direction: np.zeros(count, dtype=bool) for direction in ('up', 'down', 'right', 'left')}
+        self.alive = np.ones(count, dtype=bool)
+
+        # Animação: ação atual (True = 'run') e frame de cada inimigo
+        self.running = np.zeros(count, dtype=bool)
+        self.anim_frame = np.zeros(count, dtype=int)
+        self.anim_length = {action: game.assets['enemy/' + action].img_duration * len(game.assets['enemy/' + action].images) for action in ('idle', 'run')}
+
+        for i, enemy in enumerate(self.enemies):
+            game.scheduler.cancel(enemy.timer)  # A multidão decide quando andar
+            enemy.crowd = self
+            enemy.crowd_index = i
+
+        # Cópia compacta do bitmap de colisão do tilemap (só os chunks existentes)
+        self.grid_version = None
+        self.update_grid(game.tilemap)
+
+    def update_grid(self, tilemap):
+        # Copia os bytearrays dos chunks do tilemap para uma tabela ordenada pela
+        # chave do chunk, se o bitmap mudou. O custo e a memória acompanham os
+        # chunks existentes, não a área que eles cobrem no mundo.
+        if self.grid_version == tilemap.solid_version:
+            return
+        self.grid_version = tilemap.solid_version
+        chunks = sorted(tilemap.solid.items())  # Mesma ordem das chaves chunk x * CHUNK_KEY + chunk y
+        self.chunk_keys = np.array([chunk[0] * CHUNK_KEY + chunk[1] for chunk, bits in chunks], dtype=np.int64)
+        self.chunk_bits = np.frombuffer(b''.join(bits for chunk, bits in chunks), dtype=np.uint8).reshape(len(chunks), CHUNK_SIZE * CHUNK_SIZE)
+
+    def solid_at(self, x, y):
+        # Versão em lote de Tilemap.solid_at (x e y são arrays de tiles)
+        if not len(self.chunk_keys):
+            return np.zeros(x.shape, dtype=bool)
+        keys = (x // CHUNK_SIZE) * CHUNK_KEY + y // CHUNK_SIZE
+        slot = np.minimum(np.searchsorted(self.chunk_keys, keys), len(self.chunk_keys) - 1)
+        found = self.chunk_keys[slot] == keys
+        return found & (self.chunk_bits[slot, (y % CHUNK_SIZE) * CHUNK_SIZE + x % CHUNK_SIZE] != 0)
+
+    def move(self, ts, movement_x):
+        # Mesma resolução de scripts.collision.move, para todos os inimigos.
+        # Inimigos andam no máximo 0.5px e caem no máximo 5px por frame, então
+        # basta testar a coluna/linha atual e a próxima de cada borda.
+        w, h = self.size
+        for direction in self.collisions:
+            self.collisions[direction][:] = False
+
+        # Movimento em X
+        old_x = np.trunc(self.pos[:, 0]).astype(int)
+        self.pos[:, 0] += movement_x
+        new_x = np.trunc(self.pos[:, 0]).astype(int)
+        top = np.trunc(self.pos[:, 1]).astype(int) // ts
+        bottom = (np.trunc(self.pos[:, 1]).astype(int) + h - 1) // ts
+        for moving, first, last, edge, flag in (
+                (movement_x > 0, (old_x + w - 1) // ts, (new_x + w - 1) // ts, -w, 'right'),
+                (movement_x < 0, old_x // ts, new_x // ts, ts, 'left')):
+            hit_first = self.solid_at(first, top) | self.solid_at(first, bottom)
+            hit_last = self.solid_at(last, top) | self.solid_at(last, bottom)
+            hit = moving & self.alive & (hit_first | hit_last)
+            col = np.where(hit_first, first, last)
+            self.pos[hit, 0] = col[hit] * ts + edge
+            self.collisions[flag] |= hit
+
+        # Movimento em Y
+        old_y = np.trunc(self.pos[:, 1]).astype(int)
+        self.pos[:, 1] += self.velocity_y
+        new_y = np.trunc(self.pos[:, 1]).astype(int)
+        left = np.trunc(self.pos[:, 0]).astype(int) // ts
+        right = (np.trunc(self.pos[:, 0]).astype(int) + w - 1) // ts
+        for moving, first, last, edge, flag in (
+                (self.velocity_y > 0, (old_y + h - 1) // ts, (new_y + h - 1) // ts, -h, 'down'),
+                (self.velocity_y < 0, old_y // ts, new_y // ts, ts, 'up')):
+            hit_first = self.solid_at(left, first) | self.solid_at(right, first)
+            hit_last = self.solid_at(left, last) | self.solid_at(right, last)
+            hit = moving & self.alive & (hit_first | hit_last)
+            row = np.where(hit_first, first, last)
+            self.pos[hit, 1] = row[hit] * ts + edge
+            self.collisions[flag] |= hit
+
+    def update(self, tilemap):
+        # Um passo da simulação de todos os inimigos; retorna as views mortas
+        self.update_grid(tilemap)
+        ts = tilemap.tile_size
+        w, h = self.size
+        player = self.game.player
+        self.prev_pos[:] = self.pos
+        movement_x = np.zeros(len(self.enemies))
+
+        # Patrulha: verifica chão à frente e paredes
+        walking = (self.walking > 0) & self.alive
+        centerx = np.trunc(self.pos[:, 0]).astype(int) + w // 2
+        ahead = np.floor((centerx + np.where(self.flip, -7, 7)) / ts).astype(int)
+        below = np.floor((self.pos[:, 1] + 23) / ts).astype(int)
+        ground = self.solid_at(ahead, below)
+        wall = self.collisions['right'] | self.collisions['left']
+        turn = walking & (~ground | wall)
+        advance = walking & ground & ~wall
+        self.flip ^= turn
+        movement_x[advance] = np.where(self.flip[advance], -0.5, 0.5)
+        self.walking[walking] -= 1
+
+        # Atira se o jogador estiver perto quando termina de andar
+        frame = self.game.scheduler.frame
+        stopped = walking & (self.walking == 0)
+        if stopped.any():
+            for i in np.flatnonzero(stopped):  # Sorteia a próxima caminhada
+                self.walk_at[i] = frame + geometric(0.01)
+            dis_x = player.pos[0] - self.pos[:, 0]
+            dis_y = player.pos[1] - self.pos[:, 1]
+            shoot = stopped & (np.abs(dis_y) < 16) & ((self.flip & (dis_x < 0)) | (~self.flip & (dis_x > 0)))
+            for i in np.flatnonzero(shoot):
+                direction = -1 if self.flip[i] else 1
+                centery = int(self.pos[i, 1]) + h // 2
+                self.game.add_projectile([int(centerx[i]) + 7 * direction, centery], 1.5 * direction)
+                for j in range(4):
+                    self.game.sparks.append(Spark(self.game.projectiles[-1][0], random.random() - 0.5 + (math.pi if direction < 0 else 0), 2 + random.random()))
+
+        # Começa a andar quem chegou ao frame sorteado
+        start = ~walking & self.alive & (self.walk_at <= frame)
+        for i in np.flatnonzero(start):
+            self.walking[i] = random.randint(40, 110)
+
+        # Física: colisão, direção e gravidade
+        self.move(ts, movement_x)
+        self.flip[movement_x > 0] = False
+        self.flip[movement_x < 0] = True
+        self.velocity_y = np.where(self.alive, np.minimum(5, self.velocity_y + 0.1), 0)  # Mortos param de cair
+        self.velocity_y[self.collisions['down'] | self.collisions['up']] = 0
+
+        # Animação: avança o frame ou reinicia quando a ação muda
+        running = movement_x != 0
+        length = np.where(self.running, self.anim_length['run'], self.anim_length['idle'])
+        self.anim_frame = np.where(running != self.running, 0, (self.anim_frame + 1) % length)
+        self.running = running
+
+        # Colisão com dash do jogador
+        killed = []
+        if abs(player.dashing) >= 50:
+            prect = player.rect()
+            ex = np.trunc(self.pos[:, 0])
+            ey = np.trunc(self.pos[:, 1])
+            hit = self.alive & (ex < prect.right) & (ex + w > prect.left) & (ey < prect.bottom) & (ey + h > prect.top)
+            for i in np.flatnonzero(hit):
+                self.alive[i] = False
+                enemy = self.sync(self.enemies[i])
+                self.game.screenshake = max(16, self.game.screenshake)
+                # Cria efeitos de morte
+                for j in range(30):
+                    angle = random.random() * math.pi * 2
+                    speed = random.random() * 5
+                    self.game.sparks.append(Spark(enemy.rect().center, angle, 2 + random.random()))
+                    self.game.particles.append(Particle(self.game, 'particle', enemy.rect().center, velocity=[math.cos(angle + math.pi) * speed * 0.5, math.sin(angle + math.pi) * speed * 0.5], frame=random.randint(0, 7)))
+                self.game.sparks.append(Spark(enemy.rect().center, 0, 5 + random.random()))
+                self.game.sparks.append(Spark(enemy.rect().center, math.pi, 5 + random.random()))
+                killed.append(enemy)
+        return killed
+
+    def visible(self, bounds):
+        # Views dos inimigos vivos cuja posição está dentro de bounds (left, top, right, bottom)
+        x = self.pos[:, 0]
+        y = self.pos[:, 1]
+        mask = self.alive & (x >= bounds[0]) & (x <= bounds[2]) & (y >= bounds[1]) & (y <= bounds[3])
+        return [self.enemies[i] for i in np.flatnonzero(mask)]
+
+    def sync(self, enemy):
+        # Copia o estado dos arrays para a view (antes de renderizar)
+        i = enemy.crowd_index
+        enemy.pos = [float(self.pos[i, 0]), float(self.pos[i, 1])]
+        enemy.prev_pos = [float(self.prev_pos[i, 0]), float(self.prev_pos[i, 1])]
+        enemy.flip = bool(self.flip[i])
+        enemy.set_action('run' if self.running[i] else 'idle')
+        enemy.animation.frame = int(self.anim_frame[i])
+        return enemy
+
+    def points(self):
+        # Uma posição por chunk ocupado por inimigos vivos (para o streaming do mapa)
+        chunk_px = self.game.tilemap.tile_size * self.game.tilemap.chunk_size
+        chunks = np.unique(np.floor(self.pos[self.alive] / chunk_px).astype(int), axis=0)
+        return [(x * chunk_px, y * chunk_px) for x, y in chunks]
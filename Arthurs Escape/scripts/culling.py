@@ -0,0 +1,43 @@
+# Margens (em pixels) ao redor da posição de cada tipo de objeto que ainda podem
+# aparecer na tela: tamanho do sprite visto a partir da posição usada no cull
+ENTITY_EXTENT = 24  # Sprite 14x18 com offset (-3, -3), arma e interpolação, a partir de pos
+PROJECTILE_EXTENT = 6  # Imagem 6x4 centralizada, mais 1.5px de interpolação
+PARTICLE_EXTENT = 9  # Imagens até 12x12 centralizadas, mais até 2.5px de interpolação
+SPARK_EXTENT = 24  # Pontas do polígono a até speed * 3 (speed <= 6), mais speed de interpolação
+OFFGRID_EXTENT = 48  # Decorações até 33x44 a partir do canto superior esquerdo
+
+class Culler:
+    def __init__(self, size):
+        self.size = size  # Tamanho da área visível (width, height)
+        self.offset = (0, 0)  # Posição da câmera no frame atual
+        self.counts = {}  # Nome da lista -> [desenhados, descartados] no frame atual
+
+    def begin(self, offset):
+        # Inicia um frame com a câmera na posição offset
+        self.offset = offset
+        self.counts = {}
+
+    def bounds(self, extent):
+        # Retângulo (left, top, right, bottom) do mundo onde uma posição com essa margem é visível
+        return (self.offset[0] - extent, self.offset[1] - extent, self.offset[0] + self.size[0] + extent, self.offset[1] + self.size[1] + extent)
+
+    def record(self, name, visible, total):
+        # Soma os contadores de uma lista filtrada por fora do Culler
+        counts = self.counts.setdefault(name, [0, 0])
+        counts[0] += len(visible)
+        counts[1] += total - len(visible)
+        return visible
+
+    def cull(self, name, items, extent, pos=None):
+        # Retorna apenas os itens visíveis; pos(item) dá a posição (padrão: item.pos)
+        left, top, right, bottom = self.bounds(extent)
+        visible = []
+        for item in items:
+            p = pos(item) if pos else item.pos
+            if left <= p[0] <= right and top <= p[1] <= bottom:
+                visible.append(item)
+        return self.record(name, visible, len(items))
+
+    def report(self):
+        # Resumo dos contadores do frame: nome desenhados/total
+        return 'cull: ' + ', '.join(name + ' ' + str(counts[0]) + '/' + str(counts[0] + counts[1]) for name, counts in self.counts.items())
@@ -0,0 +1,127 @@
+from collections import deque
+
+# Máximo de células de um flood fill (acima disso o preenchimento é recusado)
+FLOOD_LIMIT = 100000
+# Máximo de operações guardadas para desfazer
+UNDO_LIMIT = 200
+
+def rect_cells(start, end):
+    # Células do retângulo entre dois cantos (inclusive)
+    for x in range(min(start[0], end[0]), max(start[0], end[0]) + 1):
+        for y in range(min(start[1], end[1]), max(start[1], end[1]) + 1):
+            yield (x, y)
+
+def flood_cells(tilemap, start):
+    # Células conectadas (4 vizinhos) com o mesmo conteúdo da célula inicial.
+    # Áreas vazias ficam limitadas à caixa dos tiles existentes (+1 de margem).
+    # Retorna [] se a região passa de FLOOD_LIMIT células, em vez de um pedaço dela.
+    target = tilemap.tile_id(start)
+    if tilemap.tilemap:
+        xs = [tile['pos'][0] for tile in tilemap.tilemap.values()]
+        ys = [tile['pos'][1] for tile in tilemap.tilemap.values()]
+        bounds = (min(xs + [start[0]]) - 1, min(ys + [start[1]]) - 1, max(xs + [start[0]]) + 1, max(ys + [start[1]]) + 1)
+    else:
+        bounds = (start[0], start[1], start[0], start[1])
+
+    cells = [start]
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        for cell in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if cell in seen or not (bounds[0] <= cell[0] <= bounds[2] and bounds[1] <= cell[1] <= bounds[3]):
+                continue
+            seen.add(cell)
+            if tilemap.tile_id(cell) == target:
+                if len(cells) >= FLOOD_LIMIT:
+                    return []
+                cells.append(cell)
+                queue.append(cell)
+    return cells
+
+def remove_tile(tiles, tile):
+    # Remove da lista exatamente esse tile (não um outro igual a ele)
+    for i, other in enumerate(tiles):
+        if other is tile:
+            del tiles[i]
+            return
+
+class EditJournal:
+    def __init__(self, tilemap):
+        self.tilemap = tilemap
+        # Operações: (tupla de (célula, antigo, novo), tupla de (tile offgrid, adicionado))
+        self.undo_stack = deque(maxlen=UNDO_LIMIT)
+        self.redo_stack = []
+        self.current = None  # Operação em andamento: célula -> [antigo, novo]
+        self.current_offgrid = []  # Tiles offgrid adicionados/removidos na operação em andamento
+
+    def begin(self):
+        # Inicia uma operação (ex.: um traço do pincel com o botão pressionado)
+        if self.current is None:
+            self.current = {}
+            self.current_offgrid = []
+
+    def end(self):
+        # Fecha a operação atual e a guarda no histórico
+        if self.current is None:
+            return
+        cells = tuple((cell, change[0], change[1]) for cell, change in self.current.items() if change[0] != change[1])
+        offgrid = tuple(self.current_offgrid)
+        self.current = None
+        self.current_offgrid = []
+        if cells or offgrid:
+            self.undo_stack.append((cells, offgrid))
+            self.redo_stack = []
+
+    def edit(self, changes):
+        # Aplica {célula: novo id ou None} de uma vez; células que não mudam são ignoradas
+        changed = self.tilemap.set_tiles(changes.items())
+        if self.current is None:
+            # Edição avulsa: as mudanças já são a operação (cada célula aparece uma vez)
+            if changed:
+                self.undo_stack.append((tuple(changed), ()))
+                self.redo_stack = []
+            return
+        for cell, old, new in changed:
+            if cell in self.current:
+                self.current[cell][1] = new
+            else:
+                self.current[cell] = [old, new]
+
+    def edit_offgrid(self, tile, added):
+        # Adiciona (added=True) ou remove um tile offgrid, registrando no histórico
+        if added:
+            self.tilemap.offgrid_tiles.append(tile)
+        else:
+            remove_tile(self.tilemap.offgrid_tiles, tile)
+        single = self.current is None
+        self.begin()
+        self.current_offgrid.append((tile, added))
+        if single:
+            self.end()
+
+    def undo(self):
+        # Desfaz a última operação
+        self.end()
+        if self.undo_stack:
+            cells, offgrid = self.undo_stack.pop()
+            self.tilemap.set_tiles([(cell, old) for cell, old, new in cells])
+            for tile, added in reversed(offgrid):
+                if added:
+                    remove_tile(self.tilemap.offgrid_tiles, tile)
+                else:
+                    self.tilemap.offgrid_tiles.append(tile)
+            self.redo_stack.append((cells, offgrid))
+
+    def redo(self):
+        # Refaz a última operação desfeita
+        self.end()
+        if self.redo_stack:
+            cells, offgrid = self.redo_stack.pop()
+            self.tilemap.set_tiles([(cell, new) for cell, old, new in cells])
+            for tile, added in offgrid:
+                if added:
+                    self.tilemap.offgrid_tiles.append(tile)
+                else:
+                    remove_tile(self.tilemap.offgrid_tiles, tile)
+            self.undo_stack.append((cells, offgrid))
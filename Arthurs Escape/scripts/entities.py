@@ -3,7 +3,10 @@ import random
 
 import pygame
 
+from scripts.collision import move
 from scripts.particle import Particle
+from scripts.scheduler import geometric
+from scripts.utils import flipped
 from scripts.spark import Spark
 
 class PhysicsEntity:
@@ -11,6 +14,7 @@ class PhysicsEntity:
         self.game = game  # Referência ao jogo principal
         self.type = e_type  # Tipo de entidade ('player' ou 'enemy')
         self.pos = list(pos)  # Posição [x, y]
+        self.prev_pos = list(pos)  # Posição no passo anterior (para interpolação)
         self.size = size  # Tamanho [width, height]
         self.velocity = [0, 0]  # Velocidade [x, y]
         self.collisions = {'up': False, 'down': False, 'right': False, 'left': False}  # Colisões
@@ -27,6 +31,10 @@ class PhysicsEntity:
         # Retorna um retângulo representando a entidade
         return pygame.Rect(self.pos[0], self.pos[1], self.size[0], self.size[1])
     
+    def interpolated_offset(self, offset, alpha):
+        # Offset de câmera que desenha a entidade entre prev_pos e pos
+        return (offset[0] - (self.pos[0] - self.prev_pos[0]) * (alpha - 1), offset[1] - (self.pos[1] - self.prev_pos[1]) * (alpha - 1))
+        
     def set_action(self, action):
         # Muda a animação se for diferente da atual
         if action != self.action:
@@ -34,37 +42,16 @@ class PhysicsEntity:
             self.animation = self.game.assets[self.type + '/' + self.action].copy()
         
     def update(self, tilemap, movement=(0, 0)):
+        self.prev_pos = list(self.pos)
+        
         # Reseta as colisões
         self.collisions = {'up': False, 'down': False, 'right': False, 'left': False}
         
         # Calcula o movimento do frame
         frame_movement = (movement[0] + self.velocity[0], movement[1] + self.velocity[1])
         
-        # Movimento em X e detecção de colisão
-        self.pos[0] += frame_movement[0]
-        entity_rect = self.rect()
-        for rect in tilemap.physics_rects_around(self.pos):
-            if entity_rect.colliderect(rect):
-                if frame_movement[0] > 0:  # Colisão à direita
-                    entity_rect.right = rect.left
-                    self.collisions['right'] = True
-                if frame_movement[0] < 0:  # Colisão à esquerda
-                    entity_rect.left = rect.right
-                    self.collisions['left'] = True
-                self.pos[0] = entity_rect.x
-        
-        # Movimento em Y e detecção de colisão
-        self.pos[1] += frame_movement[1]
-        entity_rect = self.rect()
-        for rect in tilemap.physics_rects_around(self.pos):
-            if entity_rect.colliderect(rect):
-                if frame_movement[1] > 0:  # Colisão abaixo
-                    entity_rect.bottom = rect.top
-                    self.collisions['down'] = True
-                if frame_movement[1] < 0:  # Colisão acima
-                    entity_rect.top = rect.bottom
-                    self.collisions['up'] = True
-                self.pos[1] = entity_rect.y
+        # Movimento em X e Y com colisão contra o bitmap de tiles sólidos
+        move(tilemap, self.pos, self.size, frame_movement, self.collisions)
                 
         # Define a direção do flip baseado no movimento
         if movement[0] > 0:
@@ -86,13 +73,41 @@ class PhysicsEntity:
         
     def render(self, surf, offset=(0, 0)):
         # Renderiza a entidade com flip se necessário
-        surf.blit(pygame.transform.flip(self.animation.img(), self.flip, False), (self.pos[0] - offset[0] + self.anim_offset[0], self.pos[1] - offset[1] + self.anim_offset[1]))
+        img = flipped(self.animation.img()) if self.flip else self.animation.img()
+        surf.blit(img, (self.pos[0] - offset[0] + self.anim_offset[0], self.pos[1] - offset[1] + self.anim_offset[1]))
         
 class Enemy(PhysicsEntity):
     def __init__(self, game, pos, size):
         super().__init__(game, 'enemy', pos, size)
         
-        self.walking = 0  # Timer para andar
+        self.walking = False  # Se está andando
+        self.timer = None  # Próximo evento agendado (começar/parar de andar)
+        self.crowd = None  # Crowd que simula este inimigo em lote (modo multidão)
+        self.crowd_index = None  # Índice nos arrays da Crowd
+        self.idle()
+        
+    def idle(self):
+        # Agenda o início da próxima caminhada (1% de chance por frame)
+        self.timer = self.game.scheduler.schedule(geometric(0.01), self.start_walking)
+        
+    def start_walking(self):
+        self.walking = True
+        self.timer = self.game.scheduler.schedule(random.randint(40, 110), self.stop_walking)
+        
+    def stop_walking(self):
+        self.walking = False
+        # Atira se o jogador estiver perto
+        dis = (self.game.player.pos[0] - self.pos[0], self.game.player.pos[1] - self.pos[1])
+        if (abs(dis[1]) < 16):  # Mesma altura
+            if (self.flip and dis[0] < 0):  # Jogador à esquerda
+                self.game.add_projectile([self.rect().centerx - 7, self.rect().centery], -1.5)
+                for i in range(4):
+                    self.game.sparks.append(Spark(self.game.projectiles[-1][0], random.random() - 0.5 + math.pi, 2 + random.random()))
+            if (not self.flip and dis[0] > 0):  # Jogador à direita
+                self.game.add_projectile([self.rect().centerx + 7, self.rect().centery], 1.5)
+                for i in range(4):
+                    self.game.sparks.append(Spark(self.game.projectiles[-1][0], random.random() - 0.5, 2 + random.random()))
+        self.idle()
         
     def update(self, tilemap, movement=(0, 0)):
         # Comportamento do inimigo
@@ -105,21 +120,6 @@ class Enemy(PhysicsEntity):
                     movement = (movement[0] - 0.5 if self.flip else 0.5, movement[1])
             else:  # Borda de plataforma
                 self.flip = not self.flip
-            self.walking = max(0, self.walking - 1)
-            # Atira se o jogador estiver perto
-            if not self.walking:
-                dis = (self.game.player.pos[0] - self.pos[0], self.game.player.pos[1] - self.pos[1])
-                if (abs(dis[1]) < 16):  # Mesma altura
-                    if (self.flip and dis[0] < 0):  # Jogador à esquerda
-                        self.game.projectiles.append([[self.rect().centerx - 7, self.rect().centery], -1.5, 0])
-                        for i in range(4):
-                            self.game.sparks.append(Spark(self.game.projectiles[-1][0], random.random() - 0.5 + math.pi, 2 + random.random()))
-                    if (not self.flip and dis[0] > 0):  # Jogador à direita
-                        self.game.projectiles.append([[self.rect().centerx + 7, self.rect().centery], 1.5, 0])
-                        for i in range(4):
-                            self.game.sparks.append(Spark(self.game.projectiles[-1][0], random.random() - 0.5, 2 + random.random()))
-        elif random.random() < 0.01:  # Chance de começar a andar
-            self.walking = random.randint(40, 110)
         
         super().update(tilemap, movement=movement)
         
@@ -141,6 +141,7 @@ class Enemy(PhysicsEntity):
                     self.game.particles.append(Particle(self.game, 'particle', self.rect().center, velocity=[math.cos(angle + math.pi) * speed * 0.5, math.sin(angle + math.pi) * speed * 0.5], frame=random.randint(0, 7)))
                 self.game.sparks.append(Spark(self.rect().center, 0, 5 + random.random()))
                 self.game.sparks.append(Spark(self.rect().center, math.pi, 5 + random.random()))
+                self.game.scheduler.cancel(self.timer)
                 return True  # Indica que o inimigo foi morto
             
     def render(self, surf, offset=(0, 0)):
@@ -148,7 +149,7 @@ class Enemy(PhysicsEntity):
         
         # Renderiza a arma do inimigo
         if self.flip:
-            surf.blit(pygame.transform.flip(self.game.assets['gun'], True, False), (self.rect().centerx - 4 - self.game.assets['gun'].get_width() - offset[0], self.rect().centery - offset[1]))
+            surf.blit(flipped(self.game.assets['gun']), (self.rect().centerx - 4 - self.game.assets['gun'].get_width() - offset[0], self.rect().centery - offset[1]))
         else:
             surf.blit(self.game.assets['gun'], (self.rect().centerx + 4 - offset[0], self.rect().centery - offset[1]))
 
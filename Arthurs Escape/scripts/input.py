@@ -0,0 +1,65 @@
+import time
+from collections import deque
+
+import pygame
+
+# Quantidade de medições de latência guardadas para o relatório
+LATENCY_SAMPLES = 240
+# Eventos cuja latência até a tela é medida
+MEASURED_EVENTS = {pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP}
+# Intervalo (milissegundos) entre coletas enquanto espera o próximo quadro
+POLL_INTERVAL = 1
+# Nos últimos SPIN_MARGIN segundos antes do prazo a espera não dorme, só coleta
+SPIN_MARGIN = 0.002
+
+class Input:
+    def __init__(self):
+        self.events = []  # Eventos coletados e ainda não aplicados: (timestamp, evento)
+        self.applied = []  # Timestamps de eventos aplicados que ainda não apareceram na tela
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)  # Latências input -> tela (segundos)
+
+    def poll(self):
+        # Coleta os eventos pendentes com o horário de coleta
+        now = time.perf_counter()
+        for event in pygame.event.get():
+            self.events.append((now, event))
+
+    def wait(self, deadline):
+        # Espera até deadline (perf_counter) coletando eventos assim que chegam,
+        # para que o tempo parado na fila do SDL entre na latência medida.
+        # Dorme com pygame.time.wait (o SDL pede timer de 1 ms ao sistema, ao
+        # contrário do time.sleep no Windows antes do Python 3.11) e termina a
+        # espera sem dormir, para o atraso do sono não passar do prazo.
+        while True:
+            self.poll()
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            if remaining > SPIN_MARGIN:
+                pygame.time.wait(POLL_INTERVAL)
+
+    def take(self):
+        # Entrega os eventos coletados para a simulação aplicar
+        events = []
+        for timestamp, event in self.events:
+            if event.type in MEASURED_EVENTS:
+                self.applied.append(timestamp)
+            events.append(event)
+        self.events = []
+        return events
+
+    def presented(self):
+        # Chamado logo após a tela ser atualizada: fecha a medição dos eventos aplicados
+        now = time.perf_counter()
+        for timestamp in self.applied:
+            self.latencies.append(now - timestamp)
+        self.applied = []
+
+    def report(self):
+        # Resumo das últimas latências input -> tela em milissegundos
+        if not self.latencies:
+            return 'input latency: sem amostras'
+        samples = sorted(self.latencies)
+        avg = sum(samples) / len(samples) * 1000
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000
+        return 'input latency: avg %.1f ms, p95 %.1f ms, max %.1f ms (%d amostras)' % (avg, p95, samples[-1] * 1000, len(samples))
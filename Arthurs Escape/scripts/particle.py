@@ -3,6 +3,7 @@ class Particle:
         self.game = game  # Referência ao jogo
         self.type = p_type  # Tipo de partícula ('leaf' ou 'particle')
         self.pos = list(pos)  # Posição [x, y]
+        self.prev_pos = list(pos)  # Posição no passo anterior (para interpolação)
         self.velocity = list(velocity)  # Velocidade [x, y]
         # Configura a animação baseada no tipo
         self.animation = self.game.assets['particle/' + p_type].copy()
@@ -14,6 +15,7 @@ class Particle:
             kill = True
         
         # Atualiza a posição
+        self.prev_pos = list(self.pos)
         self.pos[0] += self.velocity[0]
         self.pos[1] += self.velocity[1]
         
@@ -22,6 +24,10 @@ class Particle:
         
         return kill  # Indica se a partícula deve ser removida
     
+    def interpolated_offset(self, offset, alpha):
+        # Offset de câmera que desenha a partícula entre prev_pos e pos
+        return (offset[0] - (self.pos[0] - self.prev_pos[0]) * (alpha - 1), offset[1] - (self.pos[1] - self.prev_pos[1]) * (alpha - 1))
+    
     def render(self, surf, offset=(0, 0)):
         # Renderiza a partícula centralizada na posição
         img = self.animation.img()
@@ -0,0 +1,39 @@
+class RenderQueue:
+    # Fila de blits: guarda (imagem, posição) e desenha uma camada inteira com
+    # uma única chamada a Surface.fblits/blits. Tem a mesma interface de blit e
+    # tamanho de uma Surface, então os render() existentes podem desenhar nela.
+    def __init__(self, target):
+        self.target = target  # Surface onde as camadas são desenhadas
+        self.pending = []  # Blits da camada atual, na ordem em que foram pedidos
+        self.batch = getattr(target, 'fblits', None)  # fblits só existe no pygame-ce
+        self.blits = 0  # Blits enviados no frame (para estatísticas)
+        self.flushes = 0  # Chamadas de desenho em lote no frame
+
+    def blit(self, img, pos):
+        self.pending.append((img, pos))
+
+    def get_width(self):
+        return self.target.get_width()
+
+    def get_height(self):
+        return self.target.get_height()
+
+    def get_size(self):
+        return self.target.get_size()
+
+    def begin(self):
+        # Zera as estatísticas no início do frame
+        self.blits = 0
+        self.flushes = 0
+
+    def flush(self):
+        # Fecha a camada: desenha todos os blits pendentes de uma vez
+        if not self.pending:
+            return
+        if self.batch:
+            self.batch(self.pending)
+        else:
+            self.target.blits(self.pending, doreturn=False)
+        self.blits += len(self.pending)
+        self.flushes += 1
+        self.pending = []
@@ -0,0 +1,43 @@
+import math
+import random
+
+def geometric(chance):
+    # Sorteia em quantos frames um evento com essa chance por frame acontece
+    # (mesma distribuição de testar random.random() < chance a cada frame)
+    if chance >= 1:
+        return 1
+    return int(math.log(1 - random.random()) / math.log(1 - chance)) + 1
+
+class Scheduler:
+    def __init__(self, slots=512):
+        self.slots = [[] for i in range(slots)]  # Roda de timers: um slot por frame
+        self.frame = 0  # Frame atual
+
+    def schedule(self, delay, callback, *args):
+        # Agenda callback(*args) para daqui a delay frames (mínimo 1)
+        event = [self.frame + max(1, int(delay)), callback, args]
+        self.slots[event[0] % len(self.slots)].append(event)
+        return event
+
+    def cancel(self, event):
+        # Cancela um evento agendado
+        if event:
+            event[1] = None
+
+    def update(self):
+        # Avança um frame e executa apenas os eventos que vencem nele
+        self.frame += 1
+        slot = self.slots[self.frame % len(self.slots)]
+        if not slot:
+            return
+        due = []
+        waiting = []
+        for event in slot:
+            if event[0] <= self.frame:
+                due.append(event)
+            else:  # Vence em uma volta futura da roda
+                waiting.append(event)
+        self.slots[self.frame % len(self.slots)] = waiting
+        for event in due:
+            if event[1]:
+                event[1](*event[2])
@@ -5,10 +5,13 @@ import pygame
 class Spark:
     def __init__(self, pos, angle, speed):
         self.pos = list(pos)  # Posição [x, y]
+        self.prev_pos = list(pos)  # Posição no passo anterior (para interpolação)
         self.angle = angle  # Direção do spark
         self.speed = speed  # Velocidade
     
     def update(self):
+        self.prev_pos = list(self.pos)
+        
         # Move o spark baseado no ângulo e velocidade
         self.pos[0] += math.cos(self.angle) * self.speed
         self.pos[1] += math.sin(self.angle) * self.speed
@@ -17,6 +20,10 @@ class Spark:
         self.speed = max(0, self.speed - 0.1)
         return not self.speed  # Retorna True quando o spark deve ser removido
     
+    def interpolated_offset(self, offset, alpha):
+        # Offset de câmera que desenha o spark entre prev_pos e pos
+        return (offset[0] - (self.pos[0] - self.prev_pos[0]) * (alpha - 1), offset[1] - (self.pos[1] - self.prev_pos[1]) * (alpha - 1))
+    
     def render(self, surf, offset=(0, 0)):
         # Define os pontos para renderizar um polígono em forma de raio
         render_points = [
@@ -1,7 +1,11 @@
 import json
+import os
 
 import pygame
 
+from scripts.chunks import META_FILE, ChunkLoader, write_chunk
+from scripts.culling import OFFGRID_EXTENT
+
 # Mapeamento de autotile baseado nos vizinhos
 AUTOTILE_MAP = {
     tuple(sorted([(1, 0), (0, 1)])): 0,  # Canto inferior direito
@@ -21,6 +25,15 @@ NEIGHBOR_OFFSETS = [(-1, 0), (-1, -1), (0, -1), (1, -1), (1, 0), (0, 0), (-1, 1)
 PHYSICS_TILES = {'grass', 'stone'}
 # Tipos de tiles que suportam autotile
 AUTOTILE_TYPES = {'grass', 'stone'}
+# Tipos guardados no índice do mapa em chunks (para extract() sem carregar o mapa todo)
+INDEXED_TYPES = {'spawners', 'large_decor'}
+
+# Tamanho de um chunk em tiles
+CHUNK_SIZE = 16
+# Raio (em chunks) carregado ao redor de cada ponto de interesse
+STREAM_RADIUS = 2
+# Chunks mais distantes que esse raio de todos os pontos são descarregados
+EVICT_RADIUS = 4
 
 class Tilemap:
     def __init__(self, game, tile_size=16):
@@ -28,6 +41,18 @@ class Tilemap:
         self.tile_size = tile_size  # Tamanho dos tiles
         self.tilemap = {}  # Dicionário de tiles na grid
         self.offgrid_tiles = []  # Tiles fora da grid (decorativos)
+        self.solid = {}  # Bitmap de tiles sólidos: (chunk x, chunk y) -> bytearray
+        self.solid_version = 0  # Incrementado a cada mudança no bitmap
+        
+        # Estado do modo streaming (mapa salvo em chunks)
+        self.loader = None  # Thread que lê chunks do disco
+        self.chunk_size = CHUNK_SIZE
+        self.resident = {}  # Chunks carregados -> locs dos seus tiles
+        self.index = []  # Tiles de INDEXED_TYPES do mapa inteiro
+        self.removed = set()  # Locs removidas por extract() (não voltam ao recarregar)
+        self.centers = set()  # Chunks centrais do último stream()
+        self.wanted = set()  # Chunks a carregar ao redor desses centros
+        self.keep = set()  # Chunks que não são descarregados
         
     def extract(self, id_pairs, keep=False):
         # Extrai tiles que correspondem aos tipos e variantes especificados
@@ -40,16 +65,31 @@ class Tilemap:
                     self.offgrid_tiles.remove(tile)
                     
         # Verifica tiles na grid
-        for loc in self.tilemap:
+        found = set()
+        for loc in list(self.tilemap):
             tile = self.tilemap[loc]
             if (tile['type'], tile['variant']) in id_pairs:
+                found.add(loc)
                 matches.append(tile.copy())
                 matches[-1]['pos'] = matches[-1]['pos'].copy()
                 matches[-1]['pos'][0] *= self.tile_size  # Converte para coordenadas de pixel
                 matches[-1]['pos'][1] *= self.tile_size
                 if not keep:
                     del self.tilemap[loc]
+                    self.set_solid(tile['pos'], False)
         
+        # No modo streaming, tiles de chunks não carregados vêm do índice
+        if self.loader:
+            for tile in self.index.copy():
+                loc = str(tile['pos'][0]) + ';' + str(tile['pos'][1])
+                if (tile['type'], tile['variant']) in id_pairs:
+                    if loc not in found and loc not in self.removed:
+                        matches.append(tile.copy())
+                        matches[-1]['pos'] = [tile['pos'][0] * self.tile_size, tile['pos'][1] * self.tile_size]
+                    if not keep:
+                        self.index.remove(tile)
+                        self.removed.add(loc)
+            
         return matches  # Retorna os tiles encontrados
     
     def tiles_around(self, pos):
@@ -74,9 +114,186 @@ class Tilemap:
         map_data = json.load(f)
         f.close()
         
+        self.stop_streaming()
         self.tilemap = map_data['tilemap']
         self.tile_size = map_data['tile_size']
         self.offgrid_tiles = map_data['offgrid']
+        self.rebuild_solid()
+        
+    def save_chunks(self, path, chunk_size=CHUNK_SIZE):
+        # Salva o tilemap como um diretório de chunks independentes
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):  # Remove chunks de um export anterior
+            if name.endswith('.json'):
+                os.remove(os.path.join(path, name))
+        chunks = {}
+        index = []
+        for loc in self.tilemap:
+            tile = self.tilemap[loc]
+            chunk_loc = str(tile['pos'][0] // chunk_size) + ';' + str(tile['pos'][1] // chunk_size)
+            chunks.setdefault(chunk_loc, {})[loc] = tile
+            if tile['type'] in INDEXED_TYPES:
+                index.append(tile)
+        for chunk_loc in chunks:
+            write_chunk(path, chunk_loc, chunks[chunk_loc])
+            
+        f = open(os.path.join(path, META_FILE), 'w')
+        json.dump({'tile_size': self.tile_size, 'chunk_size': chunk_size, 'offgrid': self.offgrid_tiles, 'chunks': list(chunks), 'index': index}, f)
+        f.close()
+        
+    def load_chunks(self, path):
+        # Abre um mapa salvo em chunks; os tiles são carregados sob demanda por stream()
+        f = open(os.path.join(path, META_FILE), 'r')
+        meta = json.load(f)
+        f.close()
+        
+        self.stop_streaming()
+        self.tilemap = {}
+        self.solid = {}
+        self.solid_version += 1
+        self.tile_size = meta['tile_size']
+        self.chunk_size = meta['chunk_size']
+        self.offgrid_tiles = meta['offgrid']
+        self.index = meta['index']
+        self.removed = set()
+        self.loader = ChunkLoader(path)
+        
+    def stop_streaming(self):
+        # Volta ao modo de mapa inteiro em memória
+        if self.loader:
+            self.loader.stop()
+        self.loader = None
+        self.chunk_size = CHUNK_SIZE
+        self.resident = {}
+        self.index = []
+        self.removed = set()
+        self.centers = set()
+        self.wanted = set()
+        self.keep = set()
+        
+    def add_chunk(self, chunk_loc, tiles):
+        # Torna os tiles de um chunk residentes
+        if chunk_loc in self.resident:
+            return
+        locs = []
+        for loc in tiles:
+            if loc not in self.removed:
+                self.tilemap[loc] = tiles[loc]
+                self.set_solid(tiles[loc]['pos'], tiles[loc]['type'] in PHYSICS_TILES)
+                locs.append(loc)
+        self.resident[chunk_loc] = locs
+        
+    def drop_chunk(self, chunk_loc):
+        # Descarrega os tiles de um chunk
+        touched = set()  # Chunks do bitmap de colisão que tinham tiles desse chunk
+        for loc in self.resident.pop(chunk_loc):
+            if loc in self.tilemap:
+                pos = self.tilemap[loc]['pos']
+                self.set_solid(pos, False)
+                touched.add((pos[0] // CHUNK_SIZE, pos[1] // CHUNK_SIZE))
+                del self.tilemap[loc]
+                
+        # Remove do bitmap os chunks que ficaram vazios, para ele não crescer com
+        # todo chunk já visitado. Testar se está vazio funciona mesmo quando o
+        # chunk do mapa (meta['chunk_size']) não tem o tamanho do chunk do bitmap.
+        for chunk_key in touched:
+            if chunk_key in self.solid and not any(self.solid[chunk_key]):
+                del self.solid[chunk_key]
+                self.solid_version += 1
+                
+    def chunk_centers(self, points):
+        # Chunks que contêm os pontos (em pixels), sem repetição
+        pixel_size = self.tile_size * self.chunk_size
+        return {(int(point[0] // pixel_size), int(point[1] // pixel_size)) for point in points}
+        
+    def chunks_around(self, centers):
+        # Chunks no raio de carga ao redor dos chunks centrais
+        return {str(x) + ';' + str(y) for center in centers for x in range(center[0] - STREAM_RADIUS, center[0] + STREAM_RADIUS + 1) for y in range(center[1] - STREAM_RADIUS, center[1] + STREAM_RADIUS + 1)}
+        
+    def stream(self, points, block=False):
+        # Carrega os chunks ao redor dos pontos (câmera, entidades) e descarrega os distantes
+        if not self.loader:
+            return
+        
+        # Chunks centrais dos pontos, sem repetição (vários inimigos no mesmo chunk)
+        centers = self.chunk_centers(points)
+        
+        # Chunks desejados (raio de carga) e mantidos (raio de descarte) ao redor dos centros.
+        # Só são recalculados quando algum ponto muda de chunk.
+        if centers != self.centers:
+            self.centers = centers
+            self.keep = {(x, y) for center in centers for x in range(center[0] - EVICT_RADIUS, center[0] + EVICT_RADIUS + 1) for y in range(center[1] - EVICT_RADIUS, center[1] + EVICT_RADIUS + 1)}
+            self.wanted = self.chunks_around(centers)
+            
+            # Descarrega os chunks longe de todos os pontos
+            for chunk_loc in list(self.resident):
+                chunk = chunk_loc.split(';')
+                if (int(chunk[0]), int(chunk[1])) not in self.keep:
+                    self.drop_chunk(chunk_loc)
+                    
+        # Chunks lidos pela thread de fundo (os que já saíram do raio de descarte são ignorados)
+        for chunk_loc, tiles in self.loader.poll():
+            chunk = chunk_loc.split(';')
+            if (int(chunk[0]), int(chunk[1])) in self.keep:
+                self.add_chunk(chunk_loc, tiles)
+                
+        # Pede os chunks próximos que ainda não estão residentes
+        for chunk_loc in self.wanted - self.resident.keys():
+            if block:
+                self.add_chunk(chunk_loc, self.loader.load_now(chunk_loc))
+            else:
+                self.loader.request(chunk_loc)
+        
+    def snapshot(self, points=()):
+        # Captura o estado dos tiles para restaurar depois com restore().
+        # Durante o jogo os tiles não são alterados, então o snapshot
+        # compartilha as estruturas em vez de copiá-las.
+        if self.loader:
+            # No streaming, os chunks residentes são só um cache do disco. Os chunks ao
+            # redor dos pontos (spawns) ficam no snapshot para o restore não ler o disco.
+            chunks = {}
+            for chunk_loc in self.chunks_around(self.chunk_centers(points)):
+                chunks[chunk_loc] = self.loader.load_now(chunk_loc)
+            return {'index': list(self.index), 'removed': set(self.removed), 'chunks': chunks}
+        return {'tilemap': self.tilemap, 'offgrid': self.offgrid_tiles, 'solid': self.solid}
+        
+    def restore(self, snapshot):
+        # Restaura um estado capturado por snapshot()
+        if self.loader:
+            self.index = list(snapshot['index'])
+            self.removed = set(snapshot['removed'])
+            for chunk_loc, tiles in snapshot['chunks'].items():
+                self.add_chunk(chunk_loc, tiles)
+            self.centers = set()  # O próximo stream() recalcula o que fica residente
+            return
+        self.tilemap = snapshot['tilemap']
+        self.offgrid_tiles = snapshot['offgrid']
+        self.solid = snapshot['solid']
+        self.solid_version += 1
+        
+    def set_solid(self, tile_pos, solid):
+        # Atualiza o bit de um tile no bitmap de colisão
+        chunk_key = (tile_pos[0] // CHUNK_SIZE, tile_pos[1] // CHUNK_SIZE)
+        chunk = self.solid.get(chunk_key)
+        if chunk is None:
+            if not solid:
+                return
+            chunk = self.solid[chunk_key] = bytearray(CHUNK_SIZE * CHUNK_SIZE)
+        chunk[(tile_pos[1] % CHUNK_SIZE) * CHUNK_SIZE + tile_pos[0] % CHUNK_SIZE] = solid
+        self.solid_version += 1
+        
+    def rebuild_solid(self):
+        # Recria o bitmap de colisão a partir dos tiles na grid
+        self.solid = {}
+        self.solid_version += 1
+        for tile in self.tilemap.values():
+            if tile['type'] in PHYSICS_TILES:
+                self.set_solid(tile['pos'], True)
+                
+    def solid_at(self, x, y):
+        # Verifica no bitmap se o tile (x, y) é sólido
+        chunk = self.solid.get((x // CHUNK_SIZE, y // CHUNK_SIZE))
+        return chunk is not None and chunk[(y % CHUNK_SIZE) * CHUNK_SIZE + x % CHUNK_SIZE]
         
     def solid_check(self, pos):
         # Verifica se há um tile sólido em uma posição
@@ -93,8 +310,9 @@ class Tilemap:
                 rects.append(pygame.Rect(tile['pos'][0] * self.tile_size, tile['pos'][1] * self.tile_size, self.tile_size, self.tile_size))
         return rects
     
-    def autotile(self):
-        # Aplica autotile baseado nos vizinhos
+    def autotile_changes(self):
+        # Calcula as variantes de autotile baseadas nos vizinhos: {célula: (tipo, variante)}
+        changes = {}
         for loc in self.tilemap:
             tile = self.tilemap[loc]
             neighbors = set()
@@ -105,14 +323,70 @@ class Tilemap:
                     if self.tilemap[check_loc]['type'] == tile['type']:
                         neighbors.add(shift)
             neighbors = tuple(sorted(neighbors))
-            # Aplica a variante correta se for um tipo de autotile
+            # Só muda tiles de autotile cuja variante está errada
             if (tile['type'] in AUTOTILE_TYPES) and (neighbors in AUTOTILE_MAP):
-                tile['variant'] = AUTOTILE_MAP[neighbors]
+                if tile['variant'] != AUTOTILE_MAP[neighbors]:
+                    changes[(tile['pos'][0], tile['pos'][1])] = (tile['type'], AUTOTILE_MAP[neighbors])
+        return changes
+        
+    def autotile(self):
+        # Aplica autotile baseado nos vizinhos
+        self.set_tiles(self.autotile_changes().items())
+
+    def tile_id(self, cell):
+        # (tipo, variante) do tile na célula, ou None se vazia
+        tile = self.tilemap.get(str(cell[0]) + ';' + str(cell[1]))
+        if tile:
+            return (tile['type'], tile['variant'])
+        return None
+        
+    def set_tiles(self, changes):
+        # Aplica um lote de [(célula, (tipo, variante) ou None)] na grid.
+        # Retorna [(célula, antigo, novo)] apenas das células que mudaram.
+        changed = []
+        tilemap = self.tilemap
+        solid = self.solid
+        bitmap_changed = False
+        for cell, new in changes:
+            loc = str(cell[0]) + ';' + str(cell[1])
+            tile = tilemap.get(loc)
+            if tile:
+                old = (tile['type'], tile['variant'])
+                if old == new:
+                    continue
+                was_solid = old[0] in PHYSICS_TILES
+            else:
+                if new is None:
+                    continue
+                old = None
+                was_solid = False
+            if new is None:
+                del tilemap[loc]
+                is_solid = False
+            else:
+                tilemap[loc] = {'type': new[0], 'variant': new[1], 'pos': [cell[0], cell[1]]}
+                is_solid = new[0] in PHYSICS_TILES
+            changed.append((cell, old, new))
+            # O bitmap de colisão só muda quando a célula passa de sólida para vazia ou vice-versa.
+            # O bit é escrito direto e solid_version sobe uma vez só no fim do lote.
+            if is_solid != was_solid:
+                chunk_key = (cell[0] // CHUNK_SIZE, cell[1] // CHUNK_SIZE)
+                chunk = solid.get(chunk_key)
+                if chunk is None:
+                    chunk = solid[chunk_key] = bytearray(CHUNK_SIZE * CHUNK_SIZE)
+                chunk[(cell[1] % CHUNK_SIZE) * CHUNK_SIZE + cell[0] % CHUNK_SIZE] = is_solid
+                bitmap_changed = True
+        if bitmap_changed:
+            self.solid_version += 1
+        return changed
 
-    def render(self, surf, offset=(0, 0)):
+    def render(self, surf, offset=(0, 0), culler=None):
         # Renderiza os tiles
-        # Tiles offgrid primeiro (decorativos)
-        for tile in self.offgrid_tiles:
+        # Tiles offgrid primeiro (decorativos), só os visíveis se houver culler
+        offgrid_tiles = self.offgrid_tiles
+        if culler:
+            offgrid_tiles = culler.cull('offgrid', offgrid_tiles, OFFGRID_EXTENT, pos=lambda tile: tile['pos'])
+        for tile in offgrid_tiles:
             surf.blit(self.game.assets[tile['type']][tile['variant']], (tile['pos'][0] - offset[0], tile['pos'][1] - offset[1]))
             
         # Tiles na grid (visíveis na câmera)
@@ -1,15 +1,84 @@
 import os
+import time
 
 import pygame
 
 # Caminho base para imagens
 BASE_IMG_PATH = 'data/images/'
 
+# Formatos de blit para imagens com transparência (todos geram os mesmos pixels)
+BLIT_FORMATS = ('colorkey', 'rle', 'alpha')
+# Micro-benchmark do relatório: rodadas x blits por rodada (vale o melhor tempo)
+BENCH_ROUNDS = 5
+BENCH_BLITS = 2000
+
+# Relatório da otimização: (caminho, tipo, formato escolhido)
+asset_report = []
+# Variantes derivadas em cache: (imagem, variante) -> Surface
+variants = {}
+
+def blit_format(img, fmt):
+    # Cria a versão da imagem (já convertida) no formato de blit pedido
+    if fmt == 'convert':
+        return img
+    surf = img.copy()
+    if fmt == 'rle':
+        surf.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+        return surf
+    surf.set_colorkey((0, 0, 0))
+    if fmt == 'alpha':  # O colorkey vira canal alfa
+        return surf.convert_alpha()
+    return surf
+
+def bench_blit(img):
+    # Melhor tempo médio (em microssegundos) de um blit da imagem
+    target = pygame.Surface((img.get_width() + 8, img.get_height() + 8)).convert()
+    best = None
+    for i in range(BENCH_ROUNDS):
+        start = time.perf_counter()
+        for j in range(BENCH_BLITS):
+            target.blit(img, (j % 8, 0))
+        elapsed = (time.perf_counter() - start) / BENCH_BLITS * 1000000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def optimize_image(img, path=''):
+    # Escolhe o formato de blit de uma imagem (já convertida) com preto transparente
+    # pela análise dos pixels, para que a escolha seja a mesma em toda execução:
+    # sem transparência basta o convert; com transparência o RLE pula os trechos
+    # transparentes e foi o mais rápido na média das imagens do jogo (veja o relatório)
+    keyed = img.copy()
+    keyed.set_colorkey((0, 0, 0))
+    visible = pygame.mask.from_surface(keyed).count()
+    total = img.get_width() * img.get_height()
+    if visible == total:  # Nenhum pixel transparente: não precisa de colorkey
+        kind = 'opaque'
+        fmt = 'convert'
+    else:
+        kind = 'sparse' if visible < total / 2 else 'colorkey'
+        fmt = 'rle'
+    asset_report.append((path, kind, fmt))
+    return blit_format(img, fmt)
+
 def load_image(path):
-    # Carrega uma imagem e define preto como cor transparente
+    # Carrega uma imagem com preto como cor transparente, no formato de blit mais rápido
     img = pygame.image.load(BASE_IMG_PATH + path).convert()
-    img.set_colorkey((0, 0, 0))
-    return img
+    return optimize_image(img, path)
+
+def flipped(img):
+    # Imagem espelhada na horizontal (em cache)
+    key = (img, 'flip')
+    if key not in variants:
+        variants[key] = pygame.transform.flip(img, True, False)
+    return variants[key]
+
+def with_alpha(img, alpha):
+    # Cópia semitransparente da imagem (em cache)
+    key = (img, alpha)
+    if key not in variants:
+        variants[key] = img.copy()
+        variants[key].set_alpha(alpha)
+    return variants[key]
 
 def load_images(path):
     # Carrega todas as imagens de um diretório
@@ -41,4 +110,21 @@ class Animation:
     
     def img(self):
         # Retorna a imagem atual
-        return self.images[int(self.frame / self.img_duration)]
\ No newline at end of file
+        return self.images[int(self.frame / self.img_duration)]
+
+def print_asset_report():
+    # Mostra o formato escolhido para cada imagem e o tempo de blit de cada candidato
+    for path, kind, fmt in asset_report:
+        img = pygame.image.load(BASE_IMG_PATH + path).convert()  # Recarrega: o jogo não guarda a cópia sem otimizar
+        formats = ('convert',) if kind == 'opaque' else BLIT_FORMATS
+        timings = {name: bench_blit(blit_format(img, name)) for name in formats}
+        print(path.ljust(36), kind.ljust(9), fmt.ljust(9), '  '.join(name + ' ' + '%.2fus' % timings[name] for name in timings))
+
+if __name__ == '__main__':
+    # python -m scripts.utils: carrega todas as imagens e mostra o relatório
+    pygame.init()
+    pygame.display.set_mode((320, 240), pygame.HIDDEN)
+    for root, dirs, files in sorted(os.walk(BASE_IMG_PATH)):
+        for name in sorted(files):
+            load_image(os.path.relpath(os.path.join(root, name), BASE_IMG_PATH).replace(os.sep, '/'))
+    print_asset_report()